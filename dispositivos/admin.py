@@ -1,24 +1,61 @@
+from functools import cache
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
 from django.utils.html import format_html
-from django.urls import reverse
+from django.urls import reverse, get_script_prefix
 from django.utils.safestring import mark_safe
-from django.db.models import Q
+from django.db.models import Q, Count
+from django.db.models.functions import Substr
 from django.contrib import messages
 from django.http import HttpResponseRedirect
 from django.forms import BaseInlineFormSet
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 from .models import Category, Zone, Device, Organization, Measurement, Alert, UserProfile
 
 
+@cache
+def _device_changelist_url(script_prefix):
+    # reverse() antepone el prefijo actual, que es justamente la clave de la cache
+    return reverse('admin:dispositivos_device_changelist')
+
+
+def device_changelist_url():
+    """URL del listado de dispositivos, resuelta una vez por prefijo de script"""
+    return _device_changelist_url(get_script_prefix())
+
+
+class ProjectedChangeList(ChangeList):
+    """ChangeList que omite en el listado las columnas que no se muestran"""
+    
+    def get_results(self, request):
+        """Proyectar solo las filas que se pintan; las acciones usan get_queryset() completo"""
+        queryset = self.queryset
+        if self.model_admin.changelist_only:
+            self.queryset = self.queryset.only(*self.model_admin.changelist_only)
+        try:
+            super().get_results(request)
+        finally:
+            self.queryset = queryset
+
+
 class BaseModelAdmin(admin.ModelAdmin):
     """Clase base para todos los modelos con configuraciones comunes"""
     exclude = ("deleted_at",)
     readonly_fields = ("created_at", "updated_at")
+    # columnas cargadas solo al pintar el listado (formulario y acciones cargan la fila completa)
+    changelist_only = ()
+    
+    def get_changelist(self, request, **kwargs):
+        return ProjectedChangeList
 
 
 class OrganizationFilteredAdmin(BaseModelAdmin):
-    
+    # ruta hacia la organizacion del registro, definida por cada subclase
+    # (sin ruta no se muestra nada a los usuarios sin privilegios)
+    _org_filter_path = None
     
     def get_queryset(self, request):
         """Filtrar por organización si el usuario no es superusuario"""
@@ -26,24 +63,12 @@ class OrganizationFilteredAdmin(BaseModelAdmin):
         
         #aplicamos un if para los operadores o lectores ya que si es superusario puede ver todo 
         if not request.user.is_superuser:
-            #verificar que el usuario exista en alguna organizacion
-            if hasattr(request.user, 'profile') and request.user.profile.organization:
-                user_org = request.user.profile.organization
-                
-                #si tenemos el campo organizacion, filtramos de una 
-                if hasattr(self.model, 'organization'):
-                    return qs.filter(organization=user_org)
-                
-                # si el atributo es deviceen el modelo fultramos por organizacion
-                elif hasattr(self.model, 'device'):
-                    return qs.filter(device__organization=user_org)
-                
-                # si el user no tiene oranizacion o esta mal logeado no mostrar nada 
-                else:
-                    return qs.none()
-            else:
+            #verificar que el usuario exista en alguna organizacion (resuelta por el middleware)
+            user_org = getattr(request, 'user_organization', None)
+            if not user_org or not self._org_filter_path:
                 # Si no tiene perfil o organización, no mostrar nada
                 return qs.none()
+            return qs.filter(**{self._org_filter_path: user_org})
         
         return qs
 
@@ -64,14 +89,18 @@ class CategoryAdmin(MasterDataAdmin):
     ordering = ('name',)
     list_select_related = ()
     
+    def get_queryset(self, request):
+        """Anotar la cantidad de dispositivos en una sola consulta"""
+        return super().get_queryset(request).annotate(_device_count=Count('devices'))
+    
     def device_count(self, obj):
         """Mostrar cantidad de dispositivos en esta categoría"""
-        count = obj.devices.count()
+        count = obj._device_count
         if count > 0:
-            url = reverse('admin:dispositivos_device_changelist') + f'?category__id__exact={obj.id}'
-            return format_html('<a href="{}">{} dispositivos</a>', url, count)
+            return format_html('<a href="{}?category__id__exact={}">{} dispositivos</a>', device_changelist_url(), obj.id, count)
         return '0 dispositivos'
     device_count.short_description = 'Dispositivos'
+    device_count.admin_order_field = '_device_count'
 
 
 @admin.register(Zone)
@@ -83,14 +112,18 @@ class ZoneAdmin(MasterDataAdmin):
     ordering = ('name',)
     list_select_related = ()
     
+    def get_queryset(self, request):
+        """Anotar la cantidad de dispositivos en una sola consulta"""
+        return super().get_queryset(request).annotate(_device_count=Count('devices'))
+    
     def device_count(self, obj):
         """Mostrar cantidad de dispositivos en esta zona"""
-        count = obj.devices.count()
+        count = obj._device_count
         if count > 0:
-            url = reverse('admin:dispositivos_device_changelist') + f'?zone__id__exact={obj.id}'
-            return format_html('<a href="{}">{} dispositivos</a>', url, count)
+            return format_html('<a href="{}?zone__id__exact={}">{} dispositivos</a>', device_changelist_url(), obj.id, count)
         return '0 dispositivos'
     device_count.short_description = 'Dispositivos'
+    device_count.admin_order_field = '_device_count'
 
 
 @admin.register(Organization)
@@ -102,71 +135,111 @@ class OrganizationAdmin(MasterDataAdmin):
     ordering = ('name',)
     list_select_related = ()
     
+    def get_queryset(self, request):
+        """Anotar la cantidad de dispositivos en una sola consulta"""
+        return super().get_queryset(request).annotate(_device_count=Count('devices'))
+    
     def device_count(self, obj):
         """Mostrar cantidad de dispositivos de esta organización"""
-        count = obj.devices.count()
+        count = obj._device_count
         if count > 0:
-            url = reverse('admin:dispositivos_device_changelist') + f'?organization__id__exact={obj.id}'
-            return format_html('<a href="{}">{} dispositivos</a>', url, count)
+            return format_html('<a href="{}?organization__id__exact={}">{} dispositivos</a>', device_changelist_url(), obj.id, count)
         return '0 dispositivos'
     device_count.short_description = 'Dispositivos'
+    device_count.admin_order_field = '_device_count'
 
 
 #tablas operativas 
 
-class MeasurementInline(admin.TabularInline):
+class RecentInlineFormSet(BaseInlineFormSet):
+    """FormSet que limita en SQL los registros existentes a los más recientes"""
+    recent_limit = None
+    
+    def get_queryset(self):
+        """Aplicar el LIMIT después de que el formset filtra por el dispositivo"""
+        if not hasattr(self, '_recent_queryset'):
+            qs = super().get_queryset()
+            self._recent_queryset = qs[:self.recent_limit] if self.recent_limit else qs
+        return self._recent_queryset
+
+
+class MeasurementFormSet(RecentInlineFormSet):
+    """FormSet personalizado para validaciones de mediciones"""
+    
+    def clean(self):
+        """Validar que las mediciones sean consistentes"""
+        if any(self.errors):
+            return
+        
+        usages = [
+            form.cleaned_data.get('usage', 0)
+            for form in self.forms
+            if form.cleaned_data and not form.cleaned_data.get('DELETE', False)
+        ]
+        if not usages:
+            return
+        # una reduccion min/max en vez de comparar forma por forma
+        if min(usages) < 0:
+            raise ValidationError('El consumo no puede ser negativo')
+        if max(usages) > 10000:
+            raise ValidationError('El consumo no puede exceder 10,000 KWh')
+
+
+class RecentInline(admin.TabularInline):
+    """Inline base que muestra solo los últimos `recent_limit` registros"""
+    formset = RecentInlineFormSet
+    recent_limit = None
+    
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.recent_limit = self.recent_limit
+        return formset
+
+
+class MeasurementInline(RecentInline):
     """Inline para mostrar mediciones en el dispositivo"""
     model = Measurement
+    formset = MeasurementFormSet
     extra = 0
     readonly_fields = ('date',)
     fields = ('date', 'usage', 'state')
     ordering = ('-date',)
-    
-    def get_queryset(self, request):
-        """Limitar a las últimas 5 mediciones"""
-        qs = super().get_queryset(request)
-        return qs[:5]
+    recent_limit = 5  # últimas 5 mediciones
 
 
-class AlertInline(admin.TabularInline):
+class AlertInline(RecentInline):
     """Inline para mostrar alertas en el dispositivo"""
     model = Alert
     extra = 0
     readonly_fields = ('date',)
     fields = ('date', 'level', 'message', 'is_resolved', 'state')
     ordering = ('-date',)
-    
-    def get_queryset(self, request):
-        """Limitar a las últimas 3 alertas"""
-        qs = super().get_queryset(request)
-        return qs[:3]
-
-
-class MeasurementFormSet(BaseInlineFormSet):
-    """FormSet personalizado para validaciones de mediciones"""
-    
-    def clean(self):
-        """Validar que las mediciones sean consistentes"""
-        if any(self.errors):
-            return
-        
-        for form in self.forms:
-            if form.cleaned_data and not form.cleaned_data.get('DELETE', False):
-                usage = form.cleaned_data.get('usage', 0)
-                if usage < 0:
-                    raise ValidationError('El consumo no puede ser negativo')
-                if usage > 10000:
-                    raise ValidationError('El consumo no puede exceder 10,000 KWh')
+    recent_limit = 3  # últimas 3 alertas
 
 
 @admin.register(Device)
 class DeviceAdmin(OrganizationFilteredAdmin):
     """Administración de Dispositivos - Tabla Operativa"""
+    _org_filter_path = 'organization'
     list_display = ('name', 'organization', 'category', 'zone', 'max_usage', 'state', 'created_at')
-    list_filter = ('state', 'category', 'zone', 'organization', 'created_at')
+    list_filter = (
+        'state',
+        ('category', admin.RelatedOnlyFieldListFilter),
+        ('zone', admin.RelatedOnlyFieldListFilter),
+        ('organization', admin.RelatedOnlyFieldListFilter),
+        'created_at',
+    )
     search_fields = ('name', 'organization__name', 'category__name', 'zone__name')
     ordering = ('name',)
     list_select_related = ('organization', 'category', 'zone')
+    # __str__ de Organization usa name y email
+    changelist_only = (
+        'name', 'state', 'created_at', 'max_usage',
+        'organization__name', 'organization__email', 'category__name', 'zone__name',
+    )
+    
+    # busqueda AJAX en vez de cargar todas las opciones en el formulario
+    autocomplete_fields = ('category', 'zone', 'organization')
     
     #inlines
     inlines = [MeasurementInline, AlertInline]
@@ -190,34 +263,41 @@ class DeviceAdmin(OrganizationFilteredAdmin):
     
     def mark_as_active(self, request, queryset):
         """Marcar dispositivos como activos"""
-        updated = queryset.update(state='ACTIVE')
+        updated = Device.bulk_set_state(queryset, Device.State.ACTIVE)
         self.message_user(request, f'{updated} dispositivos marcados como activos.')
     mark_as_active.short_description = "Marcar como activos"
     
     def mark_as_inactive(self, request, queryset):
         """Marcar dispositivos como inactivos"""
-        updated = queryset.update(state='INACTIVE')
+        updated = Device.bulk_set_state(queryset, Device.State.INACTIVE)
         self.message_user(request, f'{updated} dispositivos marcados como inactivos.')
     mark_as_inactive.short_description = "Marcar como inactivos"
     
     def generate_usage_report(self, request, queryset):
         """Generar reporte de uso para dispositivos seleccionados"""
-        if queryset.count() > 10:
+        # un solo COUNT(*) reutilizado en la validación y en el mensaje
+        count = queryset.count()
+        if count > 10:
             self.message_user(request, 'Solo se pueden generar reportes para máximo 10 dispositivos.', level=messages.WARNING)
             return
         
         # Aquí se implementaría la lógica del reporte
-        self.message_user(request, f'Reporte generado para {queryset.count()} dispositivos.')
+        self.message_user(request, f'Reporte generado para {count} dispositivos.')
     generate_usage_report.short_description = "Generar reporte de uso"
     
 @admin.register(Measurement)
 class MeasurementAdmin(OrganizationFilteredAdmin):
     """Administración de Mediciones - Tabla Operativa"""
+    _org_filter_path = 'device__organization'
     list_display = ('device', 'usage', 'date', 'state', 'created_at')
     list_filter = ('state', 'date', 'device__organization', 'device__category', 'created_at')
     search_fields = ('device__name', 'device__organization__name')
     ordering = ('-date',)
     list_select_related = ('device', 'device__organization', 'device__category')
+    changelist_only = (
+        'usage', 'date', 'state', 'created_at',
+        'device__name', 'device__organization__name', 'device__category__name',
+    )
     
     # Campos para el formulario
     fieldsets = (
@@ -246,11 +326,17 @@ class MeasurementAdmin(OrganizationFilteredAdmin):
 @admin.register(Alert)
 class AlertAdmin(OrganizationFilteredAdmin):
     """Administración de Alertas - Tabla Operativa"""
+    _org_filter_path = 'device__organization'
     list_display = ('device', 'level', 'message_short', 'is_resolved', 'date', 'state')
     list_filter = ('level', 'is_resolved', 'state', 'date', 'device__organization', 'created_at')
     search_fields = ('message', 'device__name', 'device__organization__name')
     ordering = ('-date',)
     list_select_related = ('device', 'device__organization')
+    # message lo usa __str__ en la etiqueta del checkbox de acciones
+    changelist_only = (
+        'level', 'message', 'is_resolved', 'date', 'state',
+        'device__name', 'device__organization__name',
+    )
     
     #campos para el formulario nuevo 
     fieldsets = (
@@ -269,20 +355,24 @@ class AlertAdmin(OrganizationFilteredAdmin):
     #Acciones custom
     actions = ['mark_as_resolved', 'mark_as_unresolved']
     
+    def get_queryset(self, request):
+        """Recortar el mensaje en la base de datos"""
+        return super().get_queryset(request).annotate(_msg_short=Substr('message', 1, 51))
+    
     def message_short(self, obj):
         """Mostrar mensaje truncado"""
-        return obj.message[:50] + '...' if len(obj.message) > 50 else obj.message
+        return obj._msg_short[:50] + '...' if len(obj._msg_short) > 50 else obj._msg_short
     message_short.short_description = 'Mensaje'
     
     def mark_as_resolved(self, request, queryset):
         """Marcar alertas como resueltas"""
-        updated = queryset.update(is_resolved=True)
+        updated = queryset.update(is_resolved=True, updated_at=timezone.now())
         self.message_user(request, f'{updated} alertas marcadas como resueltas.')
     mark_as_resolved.short_description = "Marcar como resueltas"
     
     def mark_as_unresolved(self, request, queryset):
         """Marcar alertas como no resueltas"""
-        updated = queryset.update(is_resolved=False)
+        updated = queryset.update(is_resolved=False, updated_at=timezone.now())
         self.message_user(request, f'{updated} alertas marcadas como no resueltas.')
     mark_as_unresolved.short_description = "Marcar como no resueltas"
     
@@ -296,6 +386,10 @@ class UserProfileAdmin(BaseModelAdmin):
     ordering = ('user__username',)
     list_select_related = ('user', 'organization')
     
+    def get_queryset(self, request):
+        """Unir usuario y organización también en búsqueda, formulario y borrado"""
+        return super().get_queryset(request).select_related('user', 'organization')
+    
     fieldsets = (
         ('Usuario', {
             'fields': ('user', 'organization', 'role')
@@ -1,18 +1,52 @@
-from django.utils.deprecation import MiddlewareMixin
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.contrib.auth.models import User
 
-class OrganizationFilterMiddleware(MiddlewareMixin):
+from .models import UserProfile
+
+class OrganizationFilterMiddleware:
     """
     Middleware para asegurar que los usuarios solo vean datos de su organización
+    
+    Soporta ejecución sync y async, así bajo ASGI no pasa por sync_to_async.
     """
+    sync_capable = True
+    async_capable = True
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+    
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        user = request.user
+        profile = None
+        if user.is_authenticated and not user.is_superuser:
+            profile = self.get_profile_queryset(user).first()
+        self.set_user_organization(request, user, profile)
+        return self.get_response(request)
+    
+    async def __acall__(self, request):
+        user = await request.auser()
+        # auser() y request.user se cachean por separado; unificarlos para que
+        # la cache del perfil quede en el objeto que usan las vistas y el admin
+        request.user = user
+        profile = None
+        if user.is_authenticated and not user.is_superuser:
+            profile = await self.get_profile_queryset(user).afirst()
+        self.set_user_organization(request, user, profile)
+        return await self.get_response(request)
+    
+    def get_profile_queryset(self, user):
+        """Perfil y organizacion en una sola consulta"""
+        return UserProfile.objects.select_related('organization').filter(user_id=user.pk)
     
-    def process_request(self, request):
-        """Procesar la request para agregar información de organización del usuario"""
-        if request.user.is_authenticated and not request.user.is_superuser:
-            if hasattr(request.user, 'profile') and request.user.profile.organization:
-                # Agregar la organización del usuario a la request para uso en templates
-                request.user_organization = request.user.profile.organization
-            else:
-                request.user_organization = None
-        else:
-            request.user_organization = None
+    def set_user_organization(self, request, user, profile):
+        """Agregar perfil y organización del usuario a la request para uso en templates y admin"""
+        if user.is_authenticated and not user.is_superuser:
+            # dejar el perfil (o su ausencia) en la cache de la relacion, asi
+            # user.profile / hasattr(user, 'profile') no vuelven a consultar
+            User.profile.related.set_cached_value(user, profile)
+        request.user_profile = profile
+        request.user_organization = profile.organization if profile else None
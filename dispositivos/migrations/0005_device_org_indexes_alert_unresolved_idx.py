@@ -0,0 +1,25 @@
+# Generated by Django 5.2.5 on 2026-10-15 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dispositivos', '0004_userprofile'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(condition=models.Q(('is_resolved', False)), fields=['device', '-date'], name='alert_unresolved_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='device',
+            index=models.Index(fields=['organization', 'state', '-created_at'], name='dispositivo_organiz_a128ae_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='device',
+            index=models.Index(fields=['organization', 'name'], name='dispositivo_organiz_670db5_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations
+
+try:
+    from django.contrib.postgres.operations import TrigramExtension
+except ImportError:
+    # sin psycopg instalado (SQLite por defecto) no hay extension que crear
+    TrigramExtension = None
+
+
+# El admin busca con icontains, que en PostgreSQL se traduce a
+# UPPER("col"::text) LIKE UPPER('%...%'); el indice trigram se crea sobre
+# esa misma expresion para que el planner lo use. En SQLite no se hace nada.
+TRIGRAM_INDEXES = [
+    ('alert_msg_trgm', 'dispositivos_alert', 'message'),
+    ('device_name_trgm', 'dispositivos_device', 'name'),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+            f'USING gin (UPPER({column}::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dispositivos', '0005_device_org_indexes_alert_unresolved_idx'),
+    ]
+
+    operations = [
+        # TrigramExtension ya se salta los backends que no son PostgreSQL
+        *([TrigramExtension()] if TrigramExtension else []),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
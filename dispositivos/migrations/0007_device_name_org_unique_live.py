@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-15 11:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dispositivos', '0006_trigram_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='device',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='device',
+            constraint=models.UniqueConstraint(condition=models.Q(('deleted_at__isnull', True)), fields=('name', 'organization'), name='device_name_org_unique_live', violation_error_message='Ya existe un dispositivo con este nombre en la organización.'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+from django.db import migrations
+
+
+# Paso previo a 0009: reescribe los codigos de texto como el entero que
+# tendra la columna SmallIntegerField, asi el ALTER ... USING col::smallint
+# (o la copia de tabla en SQLite) convierte los datos sin perderlos.
+STATE_MODELS = ['Category', 'Organization', 'Zone', 'Device', 'Measurement', 'Alert', 'UserProfile']
+CODES = {
+    'state': {'INACTIVE': 0, 'ACTIVE': 1},
+    'level': {'LOW': 0, 'MEDIUM': 1, 'HIGH': 2, 'CRITICAL': 3},
+    'role': {'VIEWER': 0, 'OPERATOR': 1, 'MANAGER': 2, 'ADMIN': 3},
+}
+# codigos antiguos que todavia existen en bases creadas antes de 0003
+# (se comparan sin distinguir mayusculas)
+LEGACY_CODES = {
+    'level': {'MID': 1},
+}
+FIELDS = [(name, 'state') for name in STATE_MODELS] + [('Alert', 'level'), ('UserProfile', 'role')]
+
+
+def text_to_integer(apps, schema_editor):
+    for model_name, field in FIELDS:
+        model = apps.get_model('dispositivos', model_name)
+        codes = {**CODES[field], **LEGACY_CODES.get(field, {})}
+        # 0002 dejo el default de level en minusculas ('mid'), por eso iexact
+        for text, number in codes.items():
+            model.objects.filter(**{f'{field}__iexact': text}).update(**{field: str(number)})
+        # cualquier otro valor haria fallar el cast de 0009 (o quedaria como texto en SQLite)
+        valid = {str(number) for number in codes.values()}
+        unknown = set(model.objects.exclude(**{f'{field}__in': valid}).values_list(field, flat=True))
+        if unknown:
+            raise ValueError(
+                f"{model_name}.{field} tiene valores sin codigo entero: {sorted(unknown)}. "
+                f"Corregirlos antes de migrar."
+            )
+
+
+def integer_to_text(apps, schema_editor):
+    for model_name, field in FIELDS:
+        model = apps.get_model('dispositivos', model_name)
+        for text, number in CODES[field].items():
+            model.objects.filter(**{field: str(number)}).update(**{field: text})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dispositivos', '0007_device_name_org_unique_live'),
+    ]
+
+    operations = [
+        migrations.RunPython(text_to_integer, integer_to_text),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-15 11:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dispositivos', '0008_state_level_role_to_integer_codes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='alert',
+            name='level',
+            field=models.SmallIntegerField(choices=[(0, 'Low'), (1, 'Medium'), (2, 'High'), (3, 'Critical')], db_index=True, default=1, help_text='Nivel de criticidad de la alerta'),
+        ),
+        migrations.AlterField(
+            model_name='alert',
+            name='state',
+            field=models.SmallIntegerField(choices=[(0, 'Inactive'), (1, 'Active')], db_index=True, default=1, help_text='Estado del registro'),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='state',
+            field=models.SmallIntegerField(choices=[(0, 'Inactive'), (1, 'Active')], db_index=True, default=1, help_text='Estado del registro'),
+        ),
+        migrations.AlterField(
+            model_name='device',
+            name='state',
+            field=models.SmallIntegerField(choices=[(0, 'Inactive'), (1, 'Active')], db_index=True, default=1, help_text='Estado del registro'),
+        ),
+        migrations.AlterField(
+            model_name='measurement',
+            name='state',
+            field=models.SmallIntegerField(choices=[(0, 'Inactive'), (1, 'Active')], db_index=True, default=1, help_text='Estado del registro'),
+        ),
+        migrations.AlterField(
+            model_name='organization',
+            name='state',
+            field=models.SmallIntegerField(choices=[(0, 'Inactive'), (1, 'Active')], db_index=True, default=1, help_text='Estado del registro'),
+        ),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='role',
+            field=models.SmallIntegerField(choices=[(0, 'Solo Lectura'), (1, 'Operador'), (2, 'Gerente'), (3, 'Administrador')], default=0, help_text='Rol del usuario en el sistema'),
+        ),
+        migrations.AlterField(
+            model_name='userprofile',
+            name='state',
+            field=models.SmallIntegerField(choices=[(0, 'Inactive'), (1, 'Active')], db_index=True, default=1, help_text='Estado del registro'),
+        ),
+        migrations.AlterField(
+            model_name='zone',
+            name='state',
+            field=models.SmallIntegerField(choices=[(0, 'Inactive'), (1, 'Active')], db_index=True, default=1, help_text='Estado del registro'),
+        ),
+    ]
@@ -1,21 +1,22 @@
 from django.db import models
+from django.db.models import Q
 from django.core.validators import MinValueValidator, MaxValueValidator, EmailValidator
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 # ----------------------------
 # Modelo Base con atributos comunes
 # ----------------------------
 class BaseModel(models.Model):
-    STATES = [
-        ("ACTIVE", "Active"),
-        ("INACTIVE", "Inactive"),
-    ]
-
-    state = models.CharField(
-        max_length=10, 
-        choices=STATES, 
-        default="ACTIVE",
+    # enteros de 2 bytes en vez de texto: indices mas chicos y comparaciones mas rapidas
+    class State(models.IntegerChoices):
+        INACTIVE = 0, "Inactive"
+        ACTIVE = 1, "Active"
+
+    state = models.SmallIntegerField(
+        choices=State.choices, 
+        default=State.ACTIVE,
         db_index=True,
         help_text="Estado del registro"
     )
@@ -37,6 +38,13 @@ class BaseModel(models.Model):
     class Meta:
         abstract = True  # no crea tabla, solo se hereda
 
+    def validate_constraints(self, exclude=None):
+        # deleted_at no se edita en los formularios, pero las restricciones
+        # condicionales lo usan; validarlo igual para no terminar en IntegrityError
+        if exclude:
+            exclude = set(exclude) - {'deleted_at'}
+        super().validate_constraints(exclude=exclude)
+
 
 # ----------------------------
 #Usar modelo antiguo y cambiar nombres a ingles y agregar atributos nuevos como la organizacion 
@@ -131,10 +139,28 @@ class Device(BaseModel):
         verbose_name = "Device"
         verbose_name_plural = "Devices"
         ordering = ['name']
-        unique_together = ['name', 'organization']
+        # unico solo entre registros vivos: un nombre borrado logicamente se puede reutilizar
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'organization'],
+                condition=Q(deleted_at__isnull=True),
+                name='device_name_org_unique_live',
+                violation_error_message="Ya existe un dispositivo con este nombre en la organización.",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['organization', 'state', '-created_at']),
+            models.Index(fields=['organization', 'name']),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.organization.name})"
+
+    @classmethod
+    def bulk_set_state(cls, qs, state):
+        """Cambiar el estado de varios dispositivos en un solo UPDATE"""
+        # update() no dispara auto_now, por eso se fija updated_at a mano
+        return qs.update(state=state, updated_at=timezone.now())
     
 class Measurement(BaseModel):
     device = models.ForeignKey(
@@ -166,12 +192,14 @@ class Measurement(BaseModel):
         return f"{self.device.name} - {self.usage} KWh ({self.date.strftime('%Y-%m-%d %H:%M')})"
     
 class Alert(BaseModel):
-    LEVELS = [
-        ("CRITICAL", "Critical"),
-        ("HIGH", "High"),
-        ("MEDIUM", "Medium"),
-        ("LOW", "Low"),
-    ]
+    class Level(models.IntegerChoices):
+        LOW = 0, "Low"
+        MEDIUM = 1, "Medium"
+        HIGH = 2, "High"
+        CRITICAL = 3, "Critical"
+
+    # lookup directo para __str__, sin pasar por get_level_display()
+    LEVEL_DISPLAY = dict(Level.choices)
     
     device = models.ForeignKey(
         Device, 
@@ -188,10 +216,9 @@ class Alert(BaseModel):
         db_index=True,
         help_text="Fecha y hora de la alerta"
     )
-    level = models.CharField(
-        max_length=10, 
-        choices=LEVELS, 
-        default="MEDIUM",
+    level = models.SmallIntegerField(
+        choices=Level.choices, 
+        default=Level.MEDIUM,
         db_index=True,
         help_text="Nivel de criticidad de la alerta"
     )
@@ -208,16 +235,24 @@ class Alert(BaseModel):
             models.Index(fields=['device', '-date']),
             models.Index(fields=['level', '-date']),
             models.Index(fields=['is_resolved', '-date']),
+            # indice parcial para el caso comun: alertas sin resolver
+            models.Index(fields=['device', '-date'], condition=Q(is_resolved=False), name='alert_unresolved_idx'),
         ]
 
     def __str__(self):
-        return f"{self.get_level_display()} - {self.device.name}: {self.message[:50]}..."
+        return f"{self.LEVEL_DISPLAY.get(self.level, self.level)} - {self.device.name}: {self.message[:50]}..."
 
 
 #para perfiles de usuario (operaodres y lectores)
 
 class UserProfile(BaseModel):
     """Perfil de usuario para control de acceso por organización"""
+    class Role(models.IntegerChoices):
+        VIEWER = 0, "Solo Lectura"
+        OPERATOR = 1, "Operador"
+        MANAGER = 2, "Gerente"
+        ADMIN = 3, "Administrador"
+
     user = models.OneToOneField(
         User, 
         on_delete=models.CASCADE,
@@ -231,15 +266,9 @@ class UserProfile(BaseModel):
         blank=True,
         help_text="Organización a la que pertenece el usuario"
     )
-    role = models.CharField(
-        max_length=50,
-        choices=[
-            ('ADMIN', 'Administrador'),
-            ('OPERATOR', 'Operador'),
-            ('VIEWER', 'Solo Lectura'),
-            ('MANAGER', 'Gerente'),
-        ],
-        default='VIEWER',
+    role = models.SmallIntegerField(
+        choices=Role.choices,
+        default=Role.VIEWER,
         help_text="Rol del usuario en el sistema"
     )
     phone = models.CharField(
@@ -264,10 +293,10 @@ class UserProfile(BaseModel):
 
     def can_edit_devices(self):
         """Verificar si el usuario puede editar dispositivos"""
-        return self.role in ['ADMIN', 'OPERATOR', 'MANAGER']
+        return self.role in [self.Role.ADMIN, self.Role.OPERATOR, self.Role.MANAGER]
 
     def can_view_all_organizations(self):
         """Verificar si el usuario puede ver todas las organizaciones"""
-        return self.user.is_superuser or self.role == 'ADMIN'
+        return self.user.is_superuser or self.role == self.Role.ADMIN
 
 
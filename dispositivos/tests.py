@@ -1,3 +1,199 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .admin import MeasurementFormSet
+from .models import Category, Zone, Device, Organization, Measurement, Alert, UserProfile
+
+
+class DeviceAdminTestMixin:
+    """Datos base para las pruebas del admin de dispositivos"""
+
+    def setUp(self):
+        self.organization = Organization.objects.create(name="EcoOrg", email="eco@org.cl")
+        self.category = Category.objects.create(name="Iluminación")
+        self.zone = Zone.objects.create(name="Oficina")
+        self.device = Device.objects.create(
+            name="Lámpara",
+            organization=self.organization,
+            category=self.category,
+            zone=self.zone,
+            max_usage=100,
+        )
+        self.admin_user = User.objects.create_superuser("admin", "admin@org.cl", "pass")
+        self.client.force_login(self.admin_user)
+
+    def device_post_data(self, measurements, alerts):
+        """Datos del formulario de cambio con las filas que muestran los inlines"""
+        device = self.device
+        data = {
+            'name': device.name,
+            'organization': device.organization_id,
+            'category': device.category_id,
+            'zone': device.zone_id,
+            'max_usage': device.max_usage,
+            'state': device.state,
+        }
+        for prefix, rows in (('measurements', measurements), ('alerts', alerts)):
+            data.update({
+                f'{prefix}-TOTAL_FORMS': len(rows),
+                f'{prefix}-INITIAL_FORMS': len(rows),
+                f'{prefix}-MIN_NUM_FORMS': 0,
+                f'{prefix}-MAX_NUM_FORMS': 1000,
+            })
+        for i, m in enumerate(measurements):
+            data.update({
+                f'measurements-{i}-id': m.pk,
+                f'measurements-{i}-device': device.pk,
+                f'measurements-{i}-usage': m.usage,
+                f'measurements-{i}-state': m.state,
+            })
+        for i, a in enumerate(alerts):
+            data.update({
+                f'alerts-{i}-id': a.pk,
+                f'alerts-{i}-device': device.pk,
+                f'alerts-{i}-level': a.level,
+                f'alerts-{i}-message': a.message,
+                f'alerts-{i}-state': a.state,
+            })
+        return data
+
+
+class RecentInlineTests(DeviceAdminTestMixin, TestCase):
+    """Los inlines del dispositivo solo muestran los registros más recientes"""
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        for i in range(7):
+            m = Measurement.objects.create(device=self.device, usage=i)
+            Measurement.objects.filter(pk=m.pk).update(date=now - timedelta(hours=i))
+        for i in range(5):
+            a = Alert.objects.create(device=self.device, message=f"Alerta {i}")
+            Alert.objects.filter(pk=a.pk).update(date=now - timedelta(hours=i))
+        self.url = f'/admin/dispositivos/device/{self.device.pk}/change/'
+
+    def test_change_view_shows_latest_rows(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        formsets = {f.formset.prefix: f.formset for f in response.context['inline_admin_formsets']}
+        self.assertIsInstance(formsets['measurements'], MeasurementFormSet)
+        self.assertEqual(
+            [f.instance.pk for f in formsets['measurements'].forms],
+            list(self.device.measurements.order_by('-date').values_list('pk', flat=True)[:5]),
+        )
+        self.assertEqual(
+            [f.instance.pk for f in formsets['alerts'].forms],
+            list(self.device.alerts.order_by('-date').values_list('pk', flat=True)[:3]),
+        )
+
+    def test_change_view_post_round_trip(self):
+        measurements = list(self.device.measurements.order_by('-date')[:5])
+        alerts = list(self.device.alerts.order_by('-date')[:3])
+        data = self.device_post_data(measurements, alerts)
+        data['measurements-0-usage'] = 42
+        data['alerts-0-is_resolved'] = 'on'
+
+        response = self.client.post(self.url, data)
+
+        self.assertEqual(response.status_code, 302)
+        measurements[0].refresh_from_db()
+        alerts[0].refresh_from_db()
+        self.assertEqual(measurements[0].usage, 42)
+        self.assertTrue(alerts[0].is_resolved)
+        self.assertEqual(self.device.measurements.count(), 7)
+        self.assertEqual(self.device.alerts.count(), 5)
+
+
+class DeviceNameUniqueLiveTests(DeviceAdminTestMixin, TestCase):
+    """El nombre de un dispositivo es único solo entre los registros vivos"""
+
+    url = '/admin/dispositivos/device/add/'
+
+    def add_post_data(self):
+        data = self.device_post_data([], [])
+        data['name'] = self.device.name
+        return data
+
+    def test_duplicate_live_name_is_form_error(self):
+        response = self.client.post(self.url, self.add_post_data())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Ya existe un dispositivo con este nombre en la organización.")
+        self.assertEqual(Device.objects.filter(name=self.device.name).count(), 1)
+
+    def test_soft_deleted_name_can_be_reused(self):
+        Device.objects.filter(pk=self.device.pk).update(deleted_at=timezone.now())
+
+        response = self.client.post(self.url, self.add_post_data())
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Device.objects.filter(name=self.device.name).count(), 2)
+
+
+class IntegerCodesMigrationTests(TransactionTestCase):
+    """0008/0009 convierten los códigos de texto en los enteros de las IntegerChoices"""
+
+    before = [('dispositivos', '0007_device_name_org_unique_live')]
+    after = [('dispositivos', '0009_state_level_role_smallint')]
+
+    def setUp(self):
+        self.migrate(self.before)
+        apps = self.executor.loader.project_state(self.before).apps
+        self.models = {
+            name: apps.get_model('dispositivos', name)
+            for name in ('Organization', 'Category', 'Zone', 'Device', 'Alert', 'UserProfile')
+        }
+        self.user_model = apps.get_model('auth', 'User')
+
+    def tearDown(self):
+        # dejar la base en la última migración para el resto de las pruebas
+        self.migrate(self.executor.loader.graph.leaf_nodes())
+
+    def migrate(self, targets):
+        self.executor = MigrationExecutor(connection)
+        self.executor.migrate(targets)
+
+    def create_legacy_rows(self):
+        m = self.models
+        organization = m['Organization'].objects.create(name="EcoOrg", email="eco@org.cl", state='ACTIVE')
+        device = m['Device'].objects.create(
+            name="Lámpara",
+            organization=organization,
+            category=m['Category'].objects.create(name="Iluminación", state='ACTIVE'),
+            zone=m['Zone'].objects.create(name="Oficina", state='INACTIVE'),
+            max_usage=100,
+            state='ACTIVE',
+        )
+        for level in ('mid', 'MID', 'HIGH', 'low'):
+            m['Alert'].objects.create(device=device, message=level, level=level, state='ACTIVE')
+        user = self.user_model.objects.create(username="operador")
+        m['UserProfile'].objects.create(user=user, organization=organization, role='OPERATOR', state='ACTIVE')
+
+    def test_text_codes_become_integers(self):
+        self.create_legacy_rows()
+
+        self.migrate(self.after)
+
+        self.assertEqual(
+            dict(Alert.objects.values_list('message', 'level')),
+            {'mid': Alert.Level.MEDIUM, 'MID': Alert.Level.MEDIUM, 'HIGH': Alert.Level.HIGH, 'low': Alert.Level.LOW},
+        )
+        self.assertEqual(Device.objects.get().state, Device.State.ACTIVE)
+        self.assertEqual(Zone.objects.get().state, Zone.State.INACTIVE)
+        self.assertEqual(UserProfile.objects.get().role, UserProfile.Role.OPERATOR)
+
+    def test_unknown_code_stops_migration(self):
+        self.create_legacy_rows()
+        self.models['Alert'].objects.filter(message='low').update(level='URGENT')
+
+        with self.assertRaisesMessage(ValueError, "Alert.level tiene valores sin codigo entero: ['URGENT']"):
+            self.migrate(self.after)
+
+        # la migración de datos se revierte completa; limpiar para que tearDown avance
+        self.assertEqual(self.models['Alert'].objects.filter(level='mid').count(), 1)
+        self.models['Alert'].objects.filter(level='URGENT').delete()
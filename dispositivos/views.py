@@ -14,9 +14,9 @@ def inicio(request):
     categories = Category.objects.filter(device__in=devices).distinct().annotate(num_devices=Count("device", distinct=True))
     measurements = Measurement.objects.filter(device__in=devices)[:10]
     alerts = Alert.objects.filter(device__in=devices)
-    alerts_mid = alerts.filter(level='MID').count()
-    alerts_high = alerts.filter(level='HIGH').count()
-    alerts_critical = alerts.filter(level='CRITICAL').count()
+    alerts_mid = alerts.filter(level=Alert.Level.MEDIUM).count()
+    alerts_high = alerts.filter(level=Alert.Level.HIGH).count()
+    alerts_critical = alerts.filter(level=Alert.Level.CRITICAL).count()
     
 
     return render(request, 'dispositivos/panel.html',{'devices':devices,'zones':zones,'categories':categories,'measurements':measurements,'alerts':alerts,'empresa':empresa,'alerts_mid':alerts_mid,'alerts_high':alerts_high,'alerts_critical':alerts_critical})